@@ -0,0 +1,54 @@
+"""cffi (ABI mode) declarations of the libccasm C API
+
+Importing this module raises ImportError if cffi is not installed, in which
+case casm.api falls back to ctypes.
+"""
+import cffi
+
+ffi = cffi.FFI()
+ffi.cdef("""
+    void* casm_STDOUT();
+    void* casm_STDERR();
+    void* casm_nullstream();
+
+    void* casm_ostringstream_new();
+    void casm_ostringstream_delete(void* ptr);
+    unsigned long casm_ostringstream_size(void* ptr);
+    char* casm_ostringstream_strcpy(void* ptr, char* c_str);
+
+    void* casm_fstream_new(const char* path);
+    void casm_fstream_delete(void* ptr);
+
+    void* casm_primclex_null();
+    void* casm_primclex_new(const char* path, void* log, void* err_log);
+    void casm_primclex_delete(void* ptr);
+    void casm_primclex_refresh(void* ptr, void* log, void* err_log,
+                               bool read_settings, bool read_composition,
+                               bool read_chem_ref, bool read_configs,
+                               bool clear_clex);
+
+    void casm_command_list(void* ptr);
+
+    int casm_capi(const char* args, void* primclex, const char* root,
+                  void* log, void* err_log);
+""")
+
+# Allocate buffers without zero-filling, for buffers that libccasm overwrites
+new_uninitialized = ffi.new_allocator(should_clear_after_alloc=False)
+
+
+def dlopen(path):
+    """Open libccasm with RTLD_GLOBAL
+
+    Arguments
+    ---------
+
+      path: str
+        Path to libccasm.*
+
+    Returns
+    -------
+      lib_ccasm: cffi library object
+        Handle to libccasm.*, with the functions declared by `ffi`
+    """
+    return ffi.dlopen(path, ffi.RTLD_GLOBAL)
@@ -3,189 +3,335 @@ from __future__ import (absolute_import, division, print_function,
 from builtins import *
 
 import ctypes
+import ctypes.util
 import glob
 import json
 import os
 import six
-from distutils.spawn import find_executable
+import subprocess
 from os.path import basename, dirname, join
+from shutil import which
 from sys import platform
 
-import sh
+try:
+    from casm.api import _ccasm_cffi
+except ImportError:
+    _ccasm_cffi = None
+
+
+def _shared_library_name(name):
+    """Return the platform-specific file name of a shared library
+
+    Ex: "libcasm" -> "libcasm.so" ("libcasm.dylib" on macOS)
+    """
+    if platform == 'darwin':
+        return name + '.dylib'
+    return name + '.so'
+
+
+def _libcasm_candidates():
+    """Generate paths at which to try loading libcasm, in order of preference
+
+    If LIBCASM is set, only that path is used. Otherwise the bare library name
+    is tried first so that the dynamic loader's own search path is used, then
+    the usual locations relative to the `ccasm` executable: "<prefix>/lib"
+    and, for uninstalled builds, the executable's own directory. Last is
+    ctypes.util.find_library('casm'), which may run ldconfig, gcc, and ld
+    subprocesses on Linux. Later candidates are only generated if the earlier
+    ones fail to load.
+    """
+    if 'LIBCASM' in os.environ:
+        yield os.environ['LIBCASM']
+        return
+    libname = _shared_library_name('libcasm')
+    yield libname
+    casm_path = which('ccasm')
+    if casm_path is not None:
+        casm_dir = dirname(os.path.realpath(casm_path))
+        yield join(dirname(casm_dir), 'lib', libname)
+        yield join(casm_dir, libname)
+    found = ctypes.util.find_library('casm')
+    if found is not None:
+        yield found
+
+
+def _load_libcasm():
+    """Load libcasm with RTLD_GLOBAL from the first candidate path that works
+
+    Returns
+    -------
+      lib_casm: ctypes.CDLL
+        Handle to libcasm.*
+
+    Raises
+    ------
+      OSError:
+        The error from the last attempt, if no candidate could be loaded
+    """
+    err = OSError("Could not find libcasm")
+    for path in _libcasm_candidates():
+        try:
+            return ctypes.CDLL(path, mode=ctypes.RTLD_GLOBAL)
+        except OSError as e:
+            err = e
+    raise err
+
+
+def _print_load_error():
+    """Print diagnostics for a failure to load libcasm/libccasm"""
+    print("\n~~~ Error loading casm libraries ~~~")
+    if 'LIBCASM' in os.environ:
+        libcasm_path = os.environ['LIBCASM']
+        print("Looking for libcasm at LIBCASM:", libcasm_path)
+        if not os.path.exists(libcasm_path):
+            print("File does not exist")
+            print(
+                "Install CASM if it is not installed, or update your PATH, or set LIBCASM to the location of libcasm."
+            )
+        else:
+            print(
+                "File exists, but for unknown reason could not be loaded."
+            )
+    else:
+        casm_path = which('ccasm')
+        print("which('ccasm'):", casm_path)
+        if casm_path is None:
+            print(
+                "Could not find 'ccasm' executable. CASM is not installed on your PATH."
+            )
+            print(
+                "Install CASM if it is not installed, or update your PATH, or set LIBCASM to the location of libcasm."
+            )
+        elif basename(dirname(casm_path)) == ".libs":
+            print(
+                "Found 'ccasm' executable in a '.libs' directory. Are you running tests?"
+            )
+            if platform == 'darwin':
+                check = join(dirname(casm_path), "libcasm.dylib")
+            else:
+                check = join(dirname(casm_path), "libcasm.so")
+            if os.path.exists(check):
+                print("You probably need to set LIBCASM=" + check)
+            else:
+                print(
+                    "You probably need to re-make or update your PATH"
+                )
+        else:
+            print(
+                "Found 'ccasm', but for unknown reason could not determine libcasm location."
+            )
+            if platform == 'darwin':
+                print("otool -L:")
+                res = subprocess.run(['otool', '-L', casm_path],
+                                     capture_output=True,
+                                     text=True).stdout
+            else:
+                print("ldd:")
+                res = subprocess.run(['ldd', casm_path],
+                                     capture_output=True,
+                                     text=True).stdout
+            for val in res.splitlines():
+                print(val.strip())
+    print("")
+
+
+def _ctypes_load_libccasm(libccasm_path):
+    """Load libccasm with ctypes and set its function argument types
+
+    Used if cffi is not available.
+
+    Returns
+    -------
+      lib_ccasm: ctypes.CDLL
+        Handle to libccasm.*
+    """
+    lib_ccasm = ctypes.CDLL(libccasm_path, mode=ctypes.RTLD_GLOBAL)
+
+    #### Argument types
+
+    lib_ccasm.casm_STDOUT.restype = ctypes.c_void_p
+
+    lib_ccasm.casm_STDERR.restype = ctypes.c_void_p
+
+    lib_ccasm.casm_nullstream.restype = ctypes.c_void_p
+
+    lib_ccasm.casm_ostringstream_new.restype = ctypes.c_void_p
+
+    lib_ccasm.casm_ostringstream_delete.argtypes = [
+        ctypes.c_void_p
+    ]
+    lib_ccasm.casm_ostringstream_delete.restype = None
+
+    lib_ccasm.casm_ostringstream_size.argtypes = [ctypes.c_void_p]
+    lib_ccasm.casm_ostringstream_size.restype = ctypes.c_ulong
+
+    lib_ccasm.casm_ostringstream_strcpy.argtypes = [
+        ctypes.c_void_p,
+        ctypes.POINTER(ctypes.c_char)
+    ]
+    lib_ccasm.casm_ostringstream_strcpy.restype = ctypes.POINTER(
+        ctypes.c_char)
+
+    lib_ccasm.casm_fstream_new.argtypes = [
+        ctypes.c_char_p
+    ]
+    lib_ccasm.casm_fstream_new.restype = ctypes.c_void_p
+
+    lib_ccasm.casm_fstream_delete.argtypes = [
+        ctypes.c_void_p
+    ]
+
+    lib_ccasm.casm_primclex_null.argtypes = None
+    lib_ccasm.casm_primclex_null.restype = ctypes.c_void_p
+
+    lib_ccasm.casm_primclex_new.argtypes = [
+        ctypes.c_char_p, ctypes.c_void_p, ctypes.c_void_p
+    ]
+    lib_ccasm.casm_primclex_new.restype = ctypes.c_void_p
+
+    lib_ccasm.casm_primclex_delete.argtypes = [ctypes.c_void_p]
+    lib_ccasm.casm_primclex_delete.restype = None
+
+    lib_ccasm.casm_primclex_refresh.argtypes = [
+        ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p,
+        ctypes.c_bool, ctypes.c_bool, ctypes.c_bool, ctypes.c_bool,
+        ctypes.c_bool
+    ]
+    lib_ccasm.casm_primclex_refresh.restype = None
+
+    lib_ccasm.casm_command_list.argtypes = [ctypes.c_void_p]
+    lib_ccasm.casm_command_list.restype = None
+
+    lib_ccasm.casm_capi.argtypes = [
+        ctypes.c_char_p, ctypes.c_void_p, ctypes.c_char_p,
+        ctypes.c_void_p, ctypes.c_void_p
+    ]
+    lib_ccasm.casm_capi.restype = ctypes.c_int
+
+    return lib_ccasm
+
+
+# Handles to libcasm (ctypes) and libccasm (cffi if available, else ctypes),
+# and the bound libccasm functions. These are process-global and are set once,
+# by _load().
+_loaded = False
+_lib_casm = None
+_lib_ccasm = None
+_casm_STDOUT = None
+_casm_STDERR = None
+_casm_nullstream = None
+_casm_ostringstream_new = None
+_casm_ostringstream_delete = None
+_casm_ostringstream_size = None
+_casm_ostringstream_strcpy = None
+_casm_fstream_new = None
+_casm_fstream_delete = None
+_casm_primclex_null = None
+_casm_primclex_new = None
+_casm_primclex_delete = None
+_casm_primclex_refresh = None
+_casm_command_list = None
+_casm_capi = None
+
+
+def _load():
+    """Load libcasm and libccasm and bind the libccasm functions
+
+    Only the first call does any work; later calls return immediately.
+    """
+    global _loaded, _lib_casm, _lib_ccasm, _casm_STDOUT, _casm_STDERR, \
+        _casm_nullstream, _casm_ostringstream_new, \
+        _casm_ostringstream_delete, _casm_ostringstream_size, \
+        _casm_ostringstream_strcpy, _casm_fstream_new, _casm_fstream_delete, \
+        _casm_primclex_null, _casm_primclex_new, _casm_primclex_delete, \
+        _casm_primclex_refresh, _casm_command_list, _casm_capi
+    if _loaded:
+        return
+
+    try:
+        lib_casm = _load_libcasm()
+        libccasm_path = lib_casm._name.replace('libcasm', 'libccasm')
+        if _ccasm_cffi is not None:
+            lib_ccasm = _ccasm_cffi.dlopen(libccasm_path)
+        else:
+            lib_ccasm = _ctypes_load_libccasm(libccasm_path)
+    except Exception as e:
+        _print_load_error()
+        raise e
+
+    _lib_casm = lib_casm
+    _lib_ccasm = lib_ccasm
+    _casm_STDOUT = lib_ccasm.casm_STDOUT
+    _casm_STDERR = lib_ccasm.casm_STDERR
+    _casm_nullstream = lib_ccasm.casm_nullstream
+    _casm_ostringstream_new = lib_ccasm.casm_ostringstream_new
+    _casm_ostringstream_delete = lib_ccasm.casm_ostringstream_delete
+    _casm_ostringstream_size = lib_ccasm.casm_ostringstream_size
+    _casm_ostringstream_strcpy = lib_ccasm.casm_ostringstream_strcpy
+    _casm_fstream_new = lib_ccasm.casm_fstream_new
+    _casm_fstream_delete = lib_ccasm.casm_fstream_delete
+    _casm_primclex_null = lib_ccasm.casm_primclex_null
+    _casm_primclex_new = lib_ccasm.casm_primclex_new
+    _casm_primclex_delete = lib_ccasm.casm_primclex_delete
+    _casm_primclex_refresh = lib_ccasm.casm_primclex_refresh
+    _casm_command_list = lib_ccasm.casm_command_list
+    _casm_capi = lib_ccasm.casm_capi
+    _loaded = True
+
+
+def _from_ptr(ptr):
+    """Return None if ptr is a NULL pointer returned by libccasm, else ptr
+
+    ctypes already returns NULL `c_void_p` results as None; this makes cffi
+    results match.
+    """
+    if _ccasm_cffi is not None and ptr == _ccasm_cffi.ffi.NULL:
+        return None
+    return ptr
+
+
+def _to_ptr(ptr):
+    """Return a NULL pointer that libccasm accepts if ptr is None, else ptr
+
+    ctypes accepts None for `c_void_p` arguments, but cffi requires
+    `ffi.NULL`.
+    """
+    if ptr is None and _ccasm_cffi is not None:
+        return _ccasm_cffi.ffi.NULL
+    return ptr
+
+
+def _ostringstream_to_str(ptr):
+    """Copy the value of a CASM::OStringStreamLog to bytes"""
+    size = _casm_ostringstream_size(ptr)
+    # strcpy writes `size` characters plus the terminating NUL
+    if _ccasm_cffi is not None:
+        # strcpy overwrites the buffer, so skip zero-filling it, and copy out
+        # at most `size` bytes
+        c_str = _ccasm_cffi.new_uninitialized("char[]", size + 1)
+        _casm_ostringstream_strcpy(ptr, c_str)
+        return _ccasm_cffi.ffi.string(c_str, size)
+    c_str = ctypes.create_string_buffer(size + 1)
+    _casm_ostringstream_strcpy(ptr, c_str)
+    return c_str.value
 
 
 class API(object):
     """
     Class to provide access to the libccasm C API.
 
-    Acts like a singleton by loading libcasm and libccasm into a class member the
-    first time (and only the first time) that a new API instance is constructed.
+    libcasm and libccasm are loaded into module-level globals the first time
+    (and only the first time) that a new API instance is constructed.
 
-    Each API instance uses the same shared class member to make calls.
+    Each API instance uses the same module-level function handles to make
+    calls.
     """
-    class __API(object):
-        """
-        Hidden class of which there will be only one instance
-
-        Attributes
-        ----------
-
-          lib_casm: ctypes.CDLL
-            Handle to libcasm.*
-
-          lib_ccasm: ctypes.CDLL
-            Handle to libccasm.*
-
-        """
-        def __init__(self):
-            """Loads dynamic libraries"""
-
-            try:
-                if 'LIBCASM' in os.environ:
-                    libcasm_path = os.environ['LIBCASM']
-                else:
-                    casm_path = find_executable('ccasm')
-                    if platform == 'darwin':
-                        libcasm_path = sh.grep(sh.otool('-L', casm_path),
-                                               'libcasm').split()[0]
-                        libcasm_path = libcasm_path.replace(
-                            '@loader_path', dirname(casm_path))
-                    else:
-                        libcasm_path = sh.grep(sh.ldd(casm_path),
-                                               'libcasm').split()[2]
-                libccasm_path = libcasm_path.replace('libcasm', 'libccasm')
-
-                self.lib_casm = ctypes.CDLL(libcasm_path,
-                                            mode=ctypes.RTLD_GLOBAL)
-                self.lib_ccasm = ctypes.CDLL(libccasm_path,
-                                             mode=ctypes.RTLD_GLOBAL)
-            except Exception as e:
-                print("\n~~~ Error loading casm libraries ~~~")
-                if 'LIBCASM' in os.environ:
-                    libcasm_path = os.environ['LIBCASM']
-                    print("Looking for libcasm at LIBCASM:", libcasm_path)
-                    if not os.path.exists(libcasm_path):
-                        print("File does not exist")
-                        print(
-                            "Install CASM if it is not installed, or update your PATH, or set LIBCASM to the location of libcasm."
-                        )
-                    else:
-                        print(
-                            "File exists, but for unknown reason could not be loaded."
-                        )
-                else:
-                    casm_path = find_executable('ccasm')
-                    print("find_executable('ccasm'):", casm_path)
-                    if casm_path is None:
-                        print(
-                            "Could not find 'ccasm' executable. CASM is not installed on your PATH."
-                        )
-                        print(
-                            "Install CASM if it is not installed, or update your PATH, or set LIBCASM to the location of libcasm."
-                        )
-                    elif basename(dirname(casm_path)) == ".libs":
-                        print(
-                            "Found 'ccasm' executable in a '.libs' directory. Are you running tests?"
-                        )
-                        if platform == 'darwin':
-                            check = join(dirname(casm_path), "libcasm.dylib")
-                        else:
-                            check = join(dirname(casm_path), "libcasm.so")
-                        if os.path.exists(check):
-                            print("You probably need to set LIBCASM=" + check)
-                        else:
-                            print(
-                                "You probably need to re-make or update your PATH"
-                            )
-                    else:
-                        print(
-                            "Found 'ccasm', but for unknown reason could not determine libcasm location."
-                        )
-                        if platform == 'darwin':
-                            print("otool -L:")
-                            res = sh.otool('-L', casm_path)
-                            for val in res:
-                                print(val.strip())
-                        else:
-                            print("ldd:")
-                            res = sh.ldd(casm_path)
-                            for val in res:
-                                print(val.strip())
-                print("")
-                raise e
-
-            #### Argument types
-
-            self.lib_ccasm.casm_STDOUT.restype = ctypes.c_void_p
-
-            self.lib_ccasm.casm_STDERR.restype = ctypes.c_void_p
-
-            self.lib_ccasm.casm_nullstream.restype = ctypes.c_void_p
-
-            self.lib_ccasm.casm_ostringstream_new.restype = ctypes.c_void_p
-
-            self.lib_ccasm.casm_ostringstream_delete.argtypes = [
-                ctypes.c_void_p
-            ]
-            self.lib_ccasm.casm_ostringstream_delete.restype = None
-
-            self.lib_ccasm.casm_ostringstream_size.argtypes = [ctypes.c_void_p]
-            self.lib_ccasm.casm_ostringstream_size.restype = ctypes.c_ulong
-
-            self.lib_ccasm.casm_ostringstream_strcpy.argtypes = [
-                ctypes.c_void_p,
-                ctypes.POINTER(ctypes.c_char)
-            ]
-            self.lib_ccasm.casm_ostringstream_strcpy.restype = ctypes.POINTER(
-                ctypes.c_char)
-
-            self.lib_ccasm.casm_fstream_new.argtypes = [
-                ctypes.c_char_p
-            ]
-            self.lib_ccasm.casm_fstream_new.restype = ctypes.c_void_p
-
-            self.lib_ccasm.casm_fstream_delete.argtypes = [
-                ctypes.c_void_p
-            ]
-
-            self.lib_ccasm.casm_primclex_null.argtypes = None
-            self.lib_ccasm.casm_primclex_null.restype = ctypes.c_void_p
-
-            self.lib_ccasm.casm_primclex_new.argtypes = [
-                ctypes.c_char_p, ctypes.c_void_p, ctypes.c_void_p
-            ]
-            self.lib_ccasm.casm_primclex_new.restype = ctypes.c_void_p
-
-            self.lib_ccasm.casm_primclex_delete.argtypes = [ctypes.c_void_p]
-            self.lib_ccasm.casm_primclex_delete.restype = None
-
-            self.lib_ccasm.casm_primclex_refresh.argtypes = [
-                ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p,
-                ctypes.c_bool, ctypes.c_bool, ctypes.c_bool, ctypes.c_bool,
-                ctypes.c_bool
-            ]
-            self.lib_ccasm.casm_primclex_refresh.restype = None
-
-            self.lib_ccasm.casm_command_list.argtypes = [ctypes.c_void_p]
-            self.lib_ccasm.casm_command_list.restype = None
-
-            self.lib_ccasm.casm_capi.argtypes = [
-                ctypes.c_char_p, ctypes.c_void_p, ctypes.c_char_p,
-                ctypes.c_void_p, ctypes.c_void_p
-            ]
-            self.lib_ccasm.casm_capi.restype = ctypes.c_int
-
-    __api = None
-
     def __init__(self):
         """
-        Acts like a singleton by loading libcasm and libccasm into a class member the
-        first time (and only the first time) that a new API instance is constructed.
-
-        Each API instance uses the same shared class member to make calls.
+        Loads libcasm and libccasm the first time (and only the first time)
+        that a new API instance is constructed.
         """
-        if API.__api is None:
-            API.__api = API.__API()
+        _load()
         return
 
     def stdout(self):
@@ -194,7 +340,7 @@ class API(object):
 
         This does not need to be deleted manually.
         """
-        return API.__api.lib_ccasm.casm_STDOUT()
+        return _casm_STDOUT()
 
     def stderr(self):
         """
@@ -202,7 +348,7 @@ class API(object):
 
         This does not need to be deleted manually.
         """
-        return API.__api.lib_ccasm.casm_STDERR()
+        return _casm_STDERR()
 
     def nullstream(self):
         """
@@ -210,7 +356,7 @@ class API(object):
 
         This does not need to be deleted manually.
         """
-        return API.__api.lib_ccasm.casm_nullstream()
+        return _casm_nullstream()
 
     def ostringstream_new(self):
         """
@@ -222,7 +368,7 @@ class API(object):
             Used for capturing CASM output in a string.
             This ptr needs to be deleted manually by using API.ostringstream_delete(ptr)
         """
-        return API.__api.lib_ccasm.casm_ostringstream_new()
+        return _casm_ostringstream_new()
 
     def ostringstream_to_str(self, ptr):
         """
@@ -240,10 +386,7 @@ class API(object):
             The contents of a CASM::OStringStreamLog
 
         """
-        c_str = ctypes.create_string_buffer(
-            API.__api.lib_ccasm.casm_ostringstream_size(ptr))
-        API.__api.lib_ccasm.casm_ostringstream_strcpy(ptr, c_str)
-        return c_str.value
+        return _ostringstream_to_str(ptr)
 
     def ostringstream_delete(self, ptr):
         """
@@ -255,7 +398,7 @@ class API(object):
           ptr: CASM::OStringStreamLog pointer
 
         """
-        API.__api.lib_ccasm.casm_ostringstream_delete(ptr)
+        _casm_ostringstream_delete(ptr)
         return
 
     def fstream_new(self, path):
@@ -274,7 +417,7 @@ class API(object):
             Used for capturing CASM output in a file.
             This ptr needs to be deleted manually by using API.fstream_delete(ptr)
         """
-        return API.__api.lib_ccasm.casm_fstream_new(six.b(path))
+        return _casm_fstream_new(six.b(path))
 
     def fstream_delete(self, ptr):
         """
@@ -286,7 +429,7 @@ class API(object):
           ptr: CASM::FileLog pointer
 
         """
-        API.__api.lib_ccasm.casm_fstream_delete(ptr)
+        _casm_fstream_delete(ptr)
         return
 
     def primclex_null(self):
@@ -295,10 +438,12 @@ class API(object):
 
         Returns
         -------
-          ptr: CASM::PrimClex nullptr
+          ptr: None
+            A CASM::PrimClex nullptr is returned as None, with either the cffi
+            or ctypes binding.
 
         """
-        return API.__api.lib_ccasm.casm_primclex_null()
+        return _from_ptr(_casm_primclex_null())
 
     def primclex_new(self, path, log, err_log):
         """
@@ -330,9 +475,10 @@ class API(object):
         Returns
         -------
           ptr: CASM::PrimClex pointer
+            None if the PrimClex could not be constructed.
 
         """
-        return API.__api.lib_ccasm.casm_primclex_new(six.b(path), log, err_log)
+        return _from_ptr(_casm_primclex_new(six.b(path), log, err_log))
 
     def primclex_refresh(self,
                          ptr,
@@ -379,11 +525,9 @@ class API(object):
           This does not check if what you request will cause problems.
 
         """
-        API.__api.lib_ccasm.casm_primclex_refresh(ptr, log, err_log,
-                                                  read_settings,
-                                                  read_composition,
-                                                  read_chem_ref, read_configs,
-                                                  clear_clex)
+        _casm_primclex_refresh(ptr, log, err_log, read_settings,
+                               read_composition, read_chem_ref, read_configs,
+                               clear_clex)
         return
 
     def primclex_delete(self, ptr):
@@ -396,7 +540,7 @@ class API(object):
           ptr: CASM::PrimClex pointer
 
         """
-        API.__api.lib_ccasm.casm_primclex_delete(ptr)
+        _casm_primclex_delete(ptr)
         return
 
     def command_list(self):
@@ -410,7 +554,7 @@ class API(object):
 
         """
         ptr = self.ostringstream_new()
-        API.__api.lib_ccasm.casm_command_list(ptr)
+        _casm_command_list(ptr)
         s = self.ostringstream_to_str(ptr)
         self.ostringstream_delete(ptr)
         return s
@@ -475,8 +619,53 @@ class API(object):
                 Unknown attempting to overwrite another CASM project
 
         """
-        return API.__api.lib_ccasm.casm_capi(six.b(args), primclex,
-                                             six.b(root), log, err_log)
+        return _casm_capi(six.b(args), _to_ptr(primclex), six.b(root), log,
+                          err_log)
+
+    def capi_batch(self, args_list, primclex, root, log, err_log):
+        """
+        Make a sequence of API calls using the same PrimClex, root, and logs
+
+        Equivalent to `[self.capi(args, primclex, root, log, err_log) for
+        args in args_list]`, but `root` is encoded once and the libccasm
+        function is bound once for the whole batch. Prefer this to calling
+        API.capi in a loop when issuing many commands.
+
+        Arguments
+        ---------
+
+          args_list: iterable of str
+            Strings containing the arguments for each casm command to be
+            executed, in order.
+
+          primclex: CASM::PrimClex pointer
+            A pointer to a CASM::PrimClex, as obtained from API.primclex_new()
+
+          root: str
+            A string giving the path to a root directory of a CASM project, typically
+            casm.project.Project.path
+
+          log: CASM::Log pointer
+            A pointer to a CASM::Log to write standard output
+
+          err_log: CASM::Log pointer
+            A pointer to a CASM::Log to write error output
+
+        Returns
+        -------
+          returncodes: list of int
+            The returncode of each call, in order. See API.capi for possible
+            values.
+
+        """
+        capi = _casm_capi
+        b = six.b
+        c_root = b(root)
+        primclex = _to_ptr(primclex)
+        return [
+            capi(b(args), primclex, c_root, log, err_log)
+            for args in args_list
+        ]
 
 
 def _project_path(dir=None):
@@ -549,7 +738,7 @@ def casm_command(args, root=None, combine_output=False):
       returncode: The result of running the command via the command line iterface. 'stdout' and
         'stderr' are in text type ('unicode'/'str').
     """
-    _api = API()
+    _load()
 
     # set default root
     if root is None:
@@ -558,13 +747,14 @@ def casm_command(args, root=None, combine_output=False):
             root = ""
 
     # construct stringstream objects to capture stdout, stderr
-    ss = _api.stdout()
+    ss = _casm_STDOUT()
     if combine_output:
         ss_err = ss
     else:
-        ss_err = _api.stderr()
+        ss_err = _casm_STDERR()
 
-    returncode = _api.capi(args, _api.primclex_null(), root, ss, ss_err)
+    returncode = _casm_capi(six.b(args), _casm_primclex_null(), six.b(root),
+                            ss, ss_err)
 
     return returncode
 
@@ -607,7 +797,7 @@ def casm_capture(args, root=None, combine_output=False):
           'combine_output' is True, then returns (combined_output, returncode).
 
     """
-    _api = API()
+    _load()
 
     # set default root
     if root is None:
@@ -616,23 +806,24 @@ def casm_capture(args, root=None, combine_output=False):
             root = ""
 
     # construct stringstream objects to capture stdout, stderr
-    ss = _api.ostringstream_new()
+    ss = _casm_ostringstream_new()
     if combine_output:
         ss_err = ss
     else:
-        ss_err = _api.ostringstream_new()
+        ss_err = _casm_ostringstream_new()
 
-    returncode = _api.capi(args, _api.primclex_null(), root, ss, ss_err)
+    returncode = _casm_capi(six.b(args), _casm_primclex_null(), six.b(root),
+                            ss, ss_err)
 
     # copy strings and delete stringstreams
-    stdout = _api.ostringstream_to_str(ss)
-    _api.ostringstream_delete(ss)
+    stdout = _ostringstream_to_str(ss)
+    _casm_ostringstream_delete(ss)
 
     if combine_output:
         res = (stdout.decode('utf-8'), returncode)
     else:
-        stderr = _api.ostringstream_to_str(ss_err)
-        _api.ostringstream_delete(ss_err)
+        stderr = _ostringstream_to_str(ss_err)
+        _casm_ostringstream_delete(ss_err)
 
         res = (stdout.decode('utf-8'), stderr.decode('utf-8'), returncode)
 
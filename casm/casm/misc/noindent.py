@@ -1,7 +1,18 @@
+import copy
 import json
+import numpy as np
+import re
 import six
 import uuid
 
+try:
+    import orjson
+    if not hasattr(orjson, "Fragment"):
+        # orjson.Fragment requires orjson>=3.9
+        orjson = None
+except ImportError:
+    orjson = None
+
 # ---------------------------------------------------
 # Some code to keep parts of a json string from being spread across multiple lines
 # code from: http://stackoverflow.com/questions/13249415/can-i-implement-custom-indentation-for-pretty-printing-in-python-s-json-module
@@ -20,20 +31,124 @@ class NoIndentEncoder(json.JSONEncoder):
         self.kwargs = dict(kwargs)
         del self.kwargs['indent']
         self._replacement_map = {}
+        self._prefix = uuid.uuid4().hex
 
     def default(self, o):
         if isinstance(o, NoIndent):
-            key = uuid.uuid4().hex
-            self._replacement_map[key] = json.dumps(o.value, **self.kwargs)
+            key = "%s_%d" % (self._prefix, len(self._replacement_map))
+            value = o.value
+            if isinstance(value, np.ndarray):
+                value = value.tolist()
+            self._replacement_map[key] = json.dumps(value, **self.kwargs)
             return "@@%s@@" % (key, )
         else:
             return super(NoIndentEncoder, self).default(o)
 
     def encode(self, o):
         result = super(NoIndentEncoder, self).encode(o)
-        for k, v in six.iteritems(self._replacement_map):
-            result = result.replace('"@@%s@@"' % (k, ), v)
+        if not self._replacement_map:
+            return result
+        # substitute all placeholders in a single pass over the result
+        placeholder = re.compile('"@@(%s_[0-9]+)@@"' % (self._prefix, ))
+        return placeholder.sub(lambda m: self._replacement_map[m.group(1)],
+                               result)
+
+
+# returned by _orjson_printable if data cannot be formatted like json
+_UNSUPPORTED = object()
+
+
+def _orjson_printable(value, sort_keys):
+    """Copy data, replacing values orjson would format unlike json with
+    orjson.Fragment"""
+    if isinstance(value, dict):
+        result = {}
+        for key, v in six.iteritems(value):
+            if not isinstance(key, str) or not key.isascii():
+                return _UNSUPPORTED
+            v = _orjson_printable(v, sort_keys)
+            if v is _UNSUPPORTED:
+                return v
+            result[key] = v
+        return result
+    elif isinstance(value, (list, tuple)):
+        result = []
+        for v in value:
+            v = _orjson_printable(v, sort_keys)
+            if v is _UNSUPPORTED:
+                return v
+            result.append(v)
         return result
+    elif isinstance(value, NoIndent):
+        value = value.value
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind in "biu":
+                try:
+                    # match the json module's ", " item separator
+                    return orjson.Fragment(
+                        orjson.dumps(
+                            value, option=orjson.OPT_SERIALIZE_NUMPY).replace(
+                                b",", b", "))
+                except TypeError:
+                    # dtype or memory layout not supported by orjson
+                    pass
+            # orjson formats floats unlike json, e.g. 1e-7 and null for NaN
+            value = value.tolist()
+        return orjson.Fragment(json.dumps(value, sort_keys=sort_keys))
+    elif isinstance(value, float):
+        # orjson differs for exponents and NaN/Infinity, use json's repr
+        return orjson.Fragment(json.dumps(value))
+    elif isinstance(value, int):
+        if -2**63 <= value < 2**64:
+            return value
+        # orjson only serializes 64-bit integers
+        return orjson.Fragment(json.dumps(value))
+    elif isinstance(value, str):
+        if value.isascii() and value.isprintable():
+            return value
+        # json escapes non-ASCII and control characters
+        return orjson.Fragment(json.dumps(value))
+    return value
+
+
+def dumps(data, sort_keys=False):
+    """Serialize data containing NoIndent values as 2-space indented JSON
+
+    Equivalent to
+    `json.dumps(data, cls=NoIndentEncoder, indent=2, sort_keys=sort_keys)`,
+    but uses orjson if it is installed, which is much faster for large data.
+    Floats and non-ASCII strings are still formatted by json, and data with
+    non-str dict keys is serialized by json entirely, so the output is the
+    same either way. With orjson, integer and bool numpy arrays are
+    serialized directly from their buffers.
+
+    Arguments
+    ---------
+      data: Any
+        JSON serializable data, possibly containing NoIndent values
+
+      sort_keys: bool (optional, default=False)
+        If True, output dicts sorted by key
+
+    Returns
+    -------
+      s: str
+        The JSON string
+    """
+    printable = _UNSUPPORTED
+    if orjson is not None:
+        printable = _orjson_printable(data, sort_keys)
+    if printable is _UNSUPPORTED:
+        return json.dumps(data,
+                          cls=NoIndentEncoder,
+                          indent=2,
+                          sort_keys=sort_keys)
+
+    option = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(printable, option=option).decode('utf-8')
+
 
 def singleline_arrays_json_printable(input):
     """Makes a copy of a list or dict ready nicer JSON printing
@@ -42,48 +157,51 @@ def singleline_arrays_json_printable(input):
         from casm.misc import noindent
         with open(filename, 'w') as f:
             data = singleline_arrays_json_printable(input)
-            f.write(json.dumps(data, cls=noindent.NoIndentEncoder, indent=2, sort_keys=True))
+            f.write(noindent.dumps(data, sort_keys=True))
 
     Arguments
     ---------
       input: dict or list
-        Input data, as from JSON
-
-      property_type: str
-        One of "atom", "mol", or "global"
+        Input data, as from JSON. May contain numpy arrays.
 
     Returns
     -------
         data:
             A copy of input that prints without indenting innermost arrays.
+            Lists and dicts are copied, other values are shared with input.
+            Numpy arrays are not copied: 1d arrays are wrapped with NoIndent
+            and higher dimensional arrays are split into lists of 1d views.
     """
 
+    def _ndarray(value):
+        if value.ndim <= 1:
+            return NoIndent(value)
+        return [_ndarray(x) for x in value]
+
     def _recurs_list(data):
+        """Return (copy of data, True if data contains lists, dicts, or arrays)"""
+        result = []
         subobjects = False
-        for i in range(len(data)):
-            if isinstance(data[i], dict):
+        for value in data:
+            if isinstance(value, (dict, list, np.ndarray)):
                 subobjects = True
-                _recurs_dict(data[i])
-            elif isinstance(data[i], list):
-                subobjects = True
-                if not _recurs_list(data[i]):
-                    data[i] = NoIndent(data[i])
-        return subobjects
-
-    def _recurs_dict(data):
-        for key in data:
-            if isinstance(data[key], dict):
-                _recurs_dict(data[key])
-            if isinstance(data[key], list):
-                if not _recurs_list(data[key]):
-                    data[key] = NoIndent(data[key])
-
-    import copy
-    data = copy.deepcopy(input)
+            result.append(_printable(value))
+        return result, subobjects
+
+    def _printable(value):
+        if isinstance(value, dict):
+            return {key: _printable(v) for key, v in six.iteritems(value)}
+        elif isinstance(value, list):
+            result, subobjects = _recurs_list(value)
+            return result if subobjects else NoIndent(result)
+        elif isinstance(value, np.ndarray):
+            return _ndarray(value)
+        return value
+
     if isinstance(input, dict):
-        _recurs_dict(data)
+        return _printable(input)
     elif isinstance(input, list):
-        _recurs_list(data)
-    return data
+        return _recurs_list(input)[0]
+    return copy.deepcopy(input)
 
 # ---------------------------------------------------
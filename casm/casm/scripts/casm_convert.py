@@ -1,17 +1,43 @@
 import argparse
+import concurrent.futures
 import json
 import os
 import os.path
 import sys
+import tempfile
 
 import numpy as np
 
-from casm.api import casm_capture
 from casm.misc import noindent
 from casm.project import Project, Selection, query
 from casm.project.structure import get_casm_structure_property
 
-# import ase is required at execution
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# ase is required at execution, but importing it is slow, so it is imported
+# by _import_ase() when an ASEIntermediary is constructed rather than on
+# every casm command
+ase = None
+FixAtoms = None
+FixScaled = None
+
+
+def _import_ase():
+    """Import ase, ase.io and ase.constraints once and bind module globals"""
+    global ase, FixAtoms, FixScaled
+    if FixScaled is not None:
+        return
+    try:
+        import ase.io
+        from ase.constraints import FixAtoms, FixScaled
+    except ImportError as e:
+        raise Exception(
+            "`casm convert` requires installation of ASE,\nthe Atomic Simulation Environment: https://wiki.fysik.dtu.dk/ase/about.html.\nInstallation may be as simple as `pip install ase`."
+        ) from e
+
 
 path_help = """
 Path to CASM project. Default=current working directory.
@@ -24,27 +50,81 @@ Path to CASM project. Default=current working directory.
 # }
 
 
-def _check_output(stdout, returncode, args):
-    if returncode:
-        print(stdout)
-        raise Exception("Error with '" + args + "'")
-    try:
-        return json.loads(stdout)
-    except:
-        print(stdout)
-        raise Exception("Error parsing '" + args + "' results")
+# Maximum number of --confignames per `casm query` call
+_CONFIGNAMES_CHUNK_SIZE = 256
+
+
+def _chunks(values, size):
+    """Split a list into consecutive lists of at most `size` elements"""
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _iter_query_results(casm_args, proj):
+    """Run a `casm query` and iterate over the JSON array of results
+
+    The query output is written to a temporary file instead of being captured
+    as a string. If ijson is installed the file is parsed incrementally, one
+    array element at a time. ijson is optional and is not installed with
+    casm-python; without it the whole file is parsed at once with json.load.
+
+    The temporary file is created in the directory given by
+    tempfile.gettempdir() (i.e. TMPDIR). Because libccasm splits the command
+    on whitespace, that path must not contain whitespace.
+
+    Arguments
+    ---------
+      casm_args: str
+        A `casm query` command, without the "-j -o <file>" output options
+
+      proj: casm.project.Project
+        The CASM project. Queries are run with its PrimClex, which is loaded
+        once and reused by later queries.
+
+    Returns
+    -------
+      results: generator of dict
+        The elements of the JSON array output by the query
+
+    Raises
+    ------
+      Exception:
+        If the temporary file path contains whitespace
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        output = os.path.join(tmpdir, "query.json")
+        if len(output.split()) != 1:
+            raise Exception(
+                "casm convert error: temporary file path '" + output +
+                "' contains whitespace. Set TMPDIR to a directory whose path does not contain whitespace."
+            )
+        args = casm_args + " -j -o " + output
+        stdout, returncode = proj.capture(args, combine_output=True)
+        if returncode:
+            print(stdout)
+            raise Exception("Error with '" + args + "'")
+        with open(output, 'rb') as f:
+            try:
+                if ijson is not None:
+                    for item in ijson.items(f, 'item', use_float=True):
+                        yield item
+                else:
+                    for item in json.load(f):
+                        yield item
+            except Exception as e:
+                raise Exception("Error parsing '" + args + "' results") from e
 
 
 def write_casm_structure(filename, casm_structure, force=False):
-    if os.path.exists(filename) and not force:
+    data = noindent.singleline_arrays_json_printable(casm_structure)
+    s = noindent.dumps(data, sort_keys=True)
+    # mode 'x' checks for an existing file as part of opening it
+    try:
+        f = open(filename, 'w' if force else 'x')
+    except FileExistsError:
         raise Exception("casm convert error: " + filename + " already exists")
-    with open(filename, 'w') as f:
-        data = noindent.singleline_arrays_json_printable(casm_structure)
-        f.write(
-            json.dumps(data,
-                       cls=noindent.NoIndentEncoder,
-                       indent=2,
-                       sort_keys=True))
+    with f:
+        f.write(s)
 
 
 class ASEIntermediary(object):
@@ -57,14 +137,21 @@ class ASEIntermediary(object):
         Dict of <casm_atom_type>:<ase_chemical_symbol>. Conversion performed for any casm atom_type found in the dict.
 
       ase_to_casm_chemical_symbols: dict
-        Dict of <casm_atom_type>:<ase_chemical_symbol>. Conversion performed for any casm atom_type found in the dict.
+        Dict of <ase_chemical_symbol>:<casm_atom_type>, the inverse of casm_to_ase_chemical_symbols. Conversion performed for any ase chemical symbol found in the dict.
 
     """
     def __init__(self, casm_to_ase_chemical_symbols={}):
-        self.casm_to_ase_chemical_symbols = casm_to_ase_chemical_symbols
-        self.ase_to_casm_chemical_symbols = {}
-        for key, value in casm_to_ase_chemical_symbols.items():
-            self.ase_to_casm_chemical_symbols[value] = key
+        _import_ase()
+        self.casm_to_ase_chemical_symbols = dict(casm_to_ase_chemical_symbols)
+        self.ase_to_casm_chemical_symbols = {
+            value: key
+            for key, value in casm_to_ase_chemical_symbols.items()
+        }
+
+    def __setstate__(self, state):
+        # unpickled in process pool workers, where __init__ is not called
+        _import_ase()
+        self.__dict__.update(state)
 
     def make_structure(self, casm_structure):
         """Convert a CASM structure to an ase.Atoms instance
@@ -89,8 +176,6 @@ class ASEIntermediary(object):
           ase_structure: ase.Atoms instance
             A structure as an ase.Atoms instance
         """
-        import ase
-
         cell = None
         if "lattice_vectors" in casm_structure:
             cell = casm_structure["lattice_vectors"]
@@ -100,17 +185,19 @@ class ASEIntermediary(object):
             raise Exception(
                 "Error: no `lattice_vectors` or `lattice` found in CASM structure"
             )
+        cell = np.asarray(cell, dtype=np.float64)
 
         # required - "atom_type" -> "chemical_symbols"
-        symbols = [
-            self.casm_to_ase_chemical_symbols.get(x, x)
-            for x in casm_structure["atom_type"]
-        ]
+        atom_type = casm_structure["atom_type"]
+        if self.casm_to_ase_chemical_symbols:
+            get = self.casm_to_ase_chemical_symbols.get
+            symbols = list(map(get, atom_type, atom_type))
+        else:
+            symbols = list(atom_type)
         try:
             ase_structure = ase.Atoms(symbols=symbols, cell=cell, pbc=True)
         except KeyError as e:
-            print("casm_structure[\"atom_type\"]:",
-                  casm_structure["atom_type"])
+            print("casm_structure[\"atom_type\"]:", atom_type)
             print("casm_to_ase_chemical_symbols:",
                   self.casm_to_ase_chemical_symbols)
             print("chemical_symbols:", symbols)
@@ -125,12 +212,17 @@ class ASEIntermediary(object):
         ) == "fractional":
             casm_coords_are_frac = True
 
-        atom_coords = np.array(casm_structure["atom_coords"])
+        atom_coords = np.asarray(casm_structure["atom_coords"],
+                                 dtype=np.float64).reshape(-1, 3)
         if casm_coords_are_frac:
             ase_structure.set_scaled_positions(atom_coords)
         else:
             ase_structure.set_positions(atom_coords)
 
+        # all remaining conversions are of optional atom properties
+        if not casm_structure.get("atom_properties"):
+            return ase_structure
+
         # optional "magspin" -> "initial_magnetic_moments"
         magspin = get_casm_structure_property(casm_structure, "atom",
                                               "magspin")
@@ -142,16 +234,17 @@ class ASEIntermediary(object):
                                                       "selectivedynamics")
         if selective_flags is not None:
             # begin, code snippet adapted from `ase.io.vasp`
-            from ase.constraints import FixAtoms, FixScaled
-            constraints = []
-            indices = []
-            for ind, sflags_float in enumerate(selective_flags):
-                sflags = [bool(round(x)) for x in sflags_float]
-                if sflags.any() and not sflags.all():
-                    constraints.append(FixScaled(atoms.get_cell(), ind,
-                                                 sflags))
-                elif sflags.all():
-                    indices.append(ind)
+            sflags = np.rint(np.asarray(selective_flags,
+                                        dtype=float)).astype(bool)
+            any_flags = sflags.any(axis=1)
+            all_flags = sflags.all(axis=1)
+            constraints = [
+                FixScaled(cell=ase_structure.get_cell(),
+                          a=int(ind),
+                          mask=sflags[ind])
+                for ind in np.nonzero(any_flags & ~all_flags)[0]
+            ]
+            indices = np.nonzero(all_flags)[0].tolist()
             if indices:
                 constraints.append(FixAtoms(indices))
             if constraints:
@@ -184,23 +277,24 @@ class ASEIntermediary(object):
         Returns
         -------
           casm_structure: dict
-            A CASM structure
+            A CASM structure. Array values, such as `lattice_vectors` and
+            `atom_coords`, are numpy.ndarray.
         """
         casm_structure = dict()
-        casm_structure["lattice_vectors"] = ase_structure.cell.tolist()
+        casm_structure["lattice_vectors"] = np.asarray(ase_structure.cell)
         casm_structure["coordinate_mode"] = "Fractional"
-        casm_structure["atom_coords"] = ase_structure.get_scaled_positions(
-        ).tolist()
-        casm_structure["atom_type"] = [
-            self.ase_to_casm_chemical_symbols.get(x, x)
-            for x in ase_structure.get_chemical_symbols()
-        ]
+        casm_structure["atom_coords"] = ase_structure.get_scaled_positions()
+        chemical_symbols = ase_structure.get_chemical_symbols()
+        if self.ase_to_casm_chemical_symbols:
+            get = self.ase_to_casm_chemical_symbols.get
+            casm_structure["atom_type"] = list(
+                map(get, chemical_symbols, chemical_symbols))
+        else:
+            casm_structure["atom_type"] = chemical_symbols
 
         def try_get_global_property(methodname, property_name):
             try:
                 value = getattr(ase_structure, methodname)()
-                if isinstance(value, np.ndarray):
-                    value = value.tolist()
                 print(property_name + ":", value)
                 casm_structure["global_properties"][property_name] = {
                     "value": value
@@ -222,8 +316,6 @@ class ASEIntermediary(object):
         def try_get_atom_property(methodname, property_name):
             try:
                 value = getattr(ase_structure, methodname)()
-                if isinstance(value, np.ndarray):
-                    value = value.tolist()
                 print(property_name + ":", value)
                 casm_structure["atom_properties"][property_name] = {
                     "value": value
@@ -260,7 +352,6 @@ class ASEIntermediary(object):
           ase_structure: ase.Atoms instance
             A structure as an ase.Atoms instance
         """
-        import ase.io
         if format.lower() == "casm":
             # read CASM structure and convert to Atoms
             with open(filename, 'r') as f:
@@ -269,7 +360,7 @@ class ASEIntermediary(object):
         else:
             return ase.io.read(filename=filename, index=None, format=format)
 
-    def default_filename(self, output_dir, format):
+    def default_filename(self, output_dir, format, name="structure"):
         """Make a default filename for writing structure files
 
         Arguments
@@ -281,10 +372,13 @@ class ASEIntermediary(object):
             The output structure format. Accepts formats recognized by
             ase.io.write or "casm" to write a CASM structure file.
 
+        name: str (optional, default="structure")
+            The output file name, without extension.
+
         Returns
         -------
             filename: str
-                The output file will be named `structure.<ext>`, where `<ext>`
+                The output file will be named `<name>.<ext>`, where `<ext>`
                 is the output format. If format="json", the extension will be
                 "ase.json"; if format="casm", the extension will be "casm.json".
         """
@@ -294,7 +388,7 @@ class ASEIntermediary(object):
             ext = "casm.json"
         else:
             ext = format
-        return os.path.join(output_dir, "structure." + ext)
+        return os.path.join(output_dir, name + "." + ext)
 
     def write_structure(self, filename, ase_structure, format, force=False):
         """Take an ase.Atoms instance and write to file in requested format
@@ -315,15 +409,13 @@ class ASEIntermediary(object):
             Whether to force overwrite existing files.
 
         """
-        import ase.io
-
-        if os.path.exists(filename) and not force:
-            raise Exception("casm convert error: " + filename +
-                            " already exists")
         if format.lower() == "casm":
             casm_structure = self.make_casm_structure(ase_structure)
             write_casm_structure(filename, casm_structure, force=force)
         else:
+            if not force and os.path.exists(filename):
+                raise Exception("casm convert error: " + filename +
+                                " already exists")
             ase.io.write(filename=filename,
                          images=ase_structure,
                          format=format)
@@ -341,6 +433,119 @@ class ASEIntermediary(object):
                              output_format,
                              force=force)
 
+    def convert_files(self,
+                      input_filenames,
+                      input_format,
+                      output_filenames,
+                      output_format,
+                      force=False):
+        """Use ASE to convert a sequence of structure files
+
+        The input and output formats are checked once for the whole batch,
+        when this is called and before any file is converted. The returned
+        iterator converts the files one at a time as it is consumed.
+
+        Arguments
+        ---------
+        input_filenames: list of str
+            The structure files to convert.
+
+        input_format: str
+            The input structure format. Accepts formats recognized by
+            ase.io.read or "casm" to read a CASM structure file.
+
+        output_filenames: list of str
+            The locations the converted structure files will be written, one
+            for each of `input_filenames`.
+
+        output_format: str
+            The output structure format. Accepts formats recognized by
+            ase.io.write or "casm" to write a CASM structure file.
+
+        force: bool (optional, default=False)
+            Whether to force overwrite existing files.
+
+        Returns
+        -------
+        output_filenames: iterator of str
+            Yields the location of each converted structure file, after it is
+            written. Nothing is converted unless it is iterated over.
+
+        """
+        if len(input_filenames) != len(output_filenames):
+            raise Exception(
+                "casm convert error: number of input and output files differ")
+
+        # resolve formats once for the batch
+        if input_format and input_format.lower() != "casm":
+            input_format = _ase_ioformat(input_format, "read")
+        if output_format and output_format.lower() != "casm":
+            output_format = _ase_ioformat(output_format, "write")
+
+        def _convert():
+            for input_filename, output_filename in zip(
+                    input_filenames, output_filenames):
+                self.convert_file(input_filename,
+                                  input_format,
+                                  output_filename,
+                                  output_format,
+                                  force=force)
+                yield output_filename
+
+        return _convert()
+
+
+def _ase_ioformat(format, mode):
+    """Check that ase can read or write a format, and return its name
+
+    Arguments
+    ---------
+      format: str
+        A format recognized by ase.io.read or ase.io.write
+
+      mode: str
+        Either "read" or "write"
+
+    Returns
+    -------
+      name: str
+        The name of the ase format
+    """
+    from ase.io.formats import ioformats
+    ioformat = ioformats.get(format)
+    if ioformat is None:
+        raise Exception("casm convert error: unknown format: " + format)
+    if not getattr(ioformat, "can_" + mode):
+        raise Exception("casm convert error: ase can not " + mode +
+                        " format: " + format)
+    return ioformat.name
+
+
+def _convert_config(intermediary, name, casm_structure, output_dir,
+                    output_format, force):
+    """Convert and write the structure of one configuration
+
+    Writes `<output_dir>/<name>/structure.<ext>`. This is a module-level
+    function so that it can be run in a process pool.
+
+    Returns
+    -------
+      filename: str
+        The location the converted structure file was written.
+    """
+    configdir = os.path.join(output_dir, name)
+    os.makedirs(configdir, exist_ok=True)
+    filename = intermediary.default_filename(configdir, output_format)
+    if output_format.lower() == "casm":
+        write_casm_structure(filename, casm_structure, force=force)
+    else:
+        structure = intermediary.make_structure(casm_structure)
+        intermediary.write_structure(filename,
+                                     structure,
+                                     output_format,
+                                     force=force)
+    return filename
+
 
 convert_desc = """
 
@@ -391,11 +596,15 @@ Exceptions:
 
 ### Converting existing structure files
 
-The `--input` option allows specifying an existing structure file, with format
-specified by `--input-format` to convert to a different format, specified by
-`--output-format <output_format>`. The converted structure file is named
-`structure.<output_format>` and placed in the directory specified by
-`--output-dir` (default = same directory as the input file).
+The `--input` option allows specifying one or more existing structure files,
+with format specified by `--input-format` to convert to a different format,
+specified by `--output-format <output_format>`. A single converted structure
+file is named `structure.<output_format>`. When multiple input files are given,
+each converted structure file is named after its input file, without the input
+extension, as `<input name>.<output_format>`. Converted files are placed in the
+directory specified by `--output-dir` (default = same directory as the input
+file). The `--output` option may be used instead to name the converted file for
+a single input file.
 
 ### Notes
 
@@ -447,14 +656,16 @@ def make_parser():
                         help="Name of configurations to convert",
                         nargs='*',
                         default=None)
-    parser.add_argument('--input',
-                        help="A structure file to convert",
-                        type=str,
-                        default="")
+    parser.add_argument(
+        '--input',
+        help=
+        "Structure files to convert. A single converted file is named `structure.<ext>`; with multiple input files, each is named `<input name>.<ext>`.",
+        nargs='*',
+        default=None)
     parser.add_argument(
         '--output',
         help=
-        "Output file location, for use with --input. Default is `structure.<ext>` in the --output-dir, where <ext> is determined from --output-format.",
+        "Output file location, for use with a single --input file. Default is `structure.<ext>` in the --output-dir, where <ext> is determined from --output-format.",
         type=str,
         default="")
     parser.add_argument('--input-format',
@@ -477,6 +688,13 @@ def make_parser():
         "Output location. Default is configuration directory for multiple input, or input file location for single structure file input.",
         type=str,
         default="")
+    parser.add_argument(
+        '-j',
+        '--jobs',
+        help=
+        "Number of processes used to convert configurations. Default is the number of CPUs.",
+        type=int,
+        default=None)
     parser.add_argument(
         '--chemical-symbols',
         help=
@@ -497,41 +715,55 @@ def main(argv=None):
         print(convert_desc)
         return
 
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("argument -j/--jobs: must be >= 1")
+
     intermediary = "ase"
 
     # I imagine an input option to select package used for conversion, then perform check here to see if it is available and load settings specific to that method
     if intermediary == "ase":
-        try:
-            import ase
-            import ase.io
-        except Exception as e:
-            raise Exception(
-                "`casm convert` requires installation of ASE,\nthe Atomic Simulation Environment: https://wiki.fysik.dtu.dk/ase/about.html.\nInstallation may be as simple as `pip install ase`."
-            ) from e
         casm_to_ase_chemical_symbols = {}
         if args.chemical_symbols:
             with open(args.chemical_symbols, 'r') as f:
                 casm_to_ase_chemical_symbols = json.load(f)
         intermediary = ASEIntermediary(casm_to_ase_chemical_symbols)
 
-    # if single structure file to convert
+    # if structure files to convert
     if args.input:
-        input = os.path.abspath(args.input)
-        output_dir = os.path.abspath(args.output_dir)
+        inputs = [os.path.abspath(x) for x in args.input]
         if args.output:
-            filename = os.path.abspath(args.output)
-        elif args.output_dir:
-            filename = intermediary.default_filename(output_dir,
-                                                     args.output_format)
+            if len(inputs) > 1:
+                raise Exception(
+                    "casm convert error: --output may only be used with a single --input file"
+                )
+            filenames = [os.path.abspath(args.output)]
         else:
-            filename = intermediary.default_filename(os.path.dirname(input),
-                                                     args.output_format)
-        intermediary.convert_file(input,
-                                  args.input_format,
-                                  filename,
-                                  args.output_format,
-                                  force=args.force)
-        print(filename)
+            if args.output_dir:
+                output_dirs = [os.path.abspath(args.output_dir)] * len(inputs)
+            else:
+                output_dirs = [os.path.dirname(x) for x in inputs]
+            if len(inputs) == 1:
+                names = ["structure"]
+            else:
+                # name multiple outputs after their input files
+                names = [
+                    os.path.splitext(os.path.basename(x))[0] for x in inputs
+                ]
+            filenames = [
+                intermediary.default_filename(output_dir, args.output_format,
+                                              name)
+                for output_dir, name in zip(output_dirs, names)
+            ]
+        if len(set(filenames)) != len(filenames):
+            raise Exception(
+                "casm convert error: multiple --input files would be written to the same output file"
+            )
+        for filename in intermediary.convert_files(inputs,
+                                                   args.input_format,
+                                                   filenames,
+                                                   args.output_format,
+                                                   force=args.force):
+            print(filename)
         return
 
     # if querying multiple casm structures to convert:
@@ -547,9 +779,9 @@ def main(argv=None):
         output_dir = proj.dir.configuration_dir("")
 
     # make output_dir if not existing
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    elif not os.path.isdir(output_dir):
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except FileExistsError:
         raise Exception("casm convert error: " + output_dir + \
                         " must be a directory")
 
@@ -557,40 +789,45 @@ def main(argv=None):
     casm_structures = {}
 
     if args.config_selection:
-        casm_args = "query -k structure -c " + args.config_selection + \
-            " -j -o STDOUT"
-        stdout, stderr, returncode = casm_capture(casm_args,
-                                                  root=proj.path,
-                                                  combine_output=False)
-        data = _check_output(stdout, returncode, casm_args)
-        for config in data:
-            if config["selected"]:
-                casm_structures[config["name"]] = config["structure"]
+        casm_args = "query -k structure -c " + args.config_selection
+        casm_structures.update({
+            config["name"]: config["structure"]
+            for config in _iter_query_results(casm_args, proj)
+            if config.get("selected")
+        })
 
     if args.config_names:
-        config_names_str = " ".join(args.config_names)
-        casm_args = "query -k structure -c NONE --confignames " + config_names_str + " -j -o STDOUT"
-        stdout, stderr, returncode = casm_capture(casm_args,
-                                                  root=proj.path,
-                                                  combine_output=False)
-        data = _check_output(stdout, returncode, casm_args)
-        for config in data:
-            casm_structures[config["name"]] = config["structure"]
+        for chunk in _chunks(args.config_names, _CONFIGNAMES_CHUNK_SIZE):
+            casm_args = "query -k structure -c NONE --confignames " + \
+                " ".join(chunk)
+            casm_structures.update({
+                config["name"]: config["structure"]
+                for config in _iter_query_results(casm_args, proj)
+            })
 
     # convert and write
-    for name, casm_structure in casm_structures.items():
-        configdir = os.path.join(output_dir, name)
-        os.makedirs(configdir, exist_ok=True)
-        filename = intermediary.default_filename(configdir, args.output_format)
-        if args.output_format.lower() == "casm":
-            write_casm_structure(filename, casm_structure, force=args.force)
-        else:
-            structure = intermediary.make_structure(casm_structure)
-            intermediary.write_structure(filename,
-                                         structure,
-                                         args.output_format,
-                                         force=args.force)
-        print(filename)
+    jobs = args.jobs if args.jobs is not None else (os.cpu_count() or 1)
+    if jobs > 1 and len(casm_structures) > 1:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=jobs) as executor:
+            futures = [
+                executor.submit(_convert_config, intermediary, name,
+                                casm_structure, output_dir,
+                                args.output_format, args.force)
+                for name, casm_structure in casm_structures.items()
+            ]
+            # print in submission order; on error, cancel pending conversions
+            try:
+                for future in futures:
+                    print(future.result())
+            except BaseException:
+                executor.shutdown(wait=True, cancel_futures=True)
+                raise
+    else:
+        for name, casm_structure in casm_structures.items():
+            print(
+                _convert_config(intermediary, name, casm_structure,
+                                output_dir, args.output_format, args.force))
 
 
 if __name__ == "__main__":
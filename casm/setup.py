@@ -35,8 +35,7 @@ setup(
     packages=find_packages(),
     entry_points={'console_scripts': console_scripts},
     install_requires=[
-        'deap', 'mock', 'pandas', 'prisms-jobs', 'scikit-learn',
-        'scipy', 'sh'
+        'deap', 'mock', 'pandas', 'prisms-jobs', 'scikit-learn', 'scipy'
     ],
     classifiers=[
         'Development Status :: 5 - Production/Stable',
@@ -10,10 +10,9 @@ def test_API_init():
     # this loads libcasm and libccasm one and only one time
     api = casm.api.API()
     assert len(api.__dict__) == 0
-    assert isinstance(api._API__api.lib_casm, ctypes.CDLL)
-    assert isinstance(api._API__api.lib_ccasm, ctypes.CDLL)
-    assert isinstance(casm.api.API._API__api.lib_casm, ctypes.CDLL)
-    assert isinstance(casm.api.API._API__api.lib_ccasm, ctypes.CDLL)
+    assert isinstance(casm.api.api._lib_casm, ctypes.CDLL)
+    # libccasm is loaded with cffi if available, else ctypes
+    assert casm.api.api._lib_ccasm is not None
 
 
 def test_command_list():
@@ -35,3 +34,52 @@ def test_capture_init(clean_ZrO_dir):
             "training_data"
     ]:
         assert os.path.exists(project_path.join(filename))
+
+
+def test_capi_batch(clean_ZrO_dir):
+    project_path, prim_path = clean_ZrO_dir
+    api = casm.api.API()
+    ss = api.ostringstream_new()
+    args_list = [
+        "init --path=" + str(project_path) + " --prim=" + str(prim_path),
+        "status"
+    ]
+    returncodes = api.capi_batch(args_list, api.primclex_null(),
+                                 str(project_path), ss, ss)
+    output = api.ostringstream_to_str(ss)
+    api.ostringstream_delete(ss)
+    if returncodes != [0, 0]:
+        print(output)
+    assert returncodes == [0, 0]
+    assert os.path.exists(project_path.join(".casm"))
+
+
+def test_null_pointer_conversion():
+    cffi_binding = pytest.importorskip("casm.api._ccasm_cffi")
+    NULL = cffi_binding.ffi.NULL
+    assert casm.api.api._from_ptr(NULL) is None
+    assert casm.api.api._to_ptr(None) == NULL
+
+
+@pytest.fixture
+def ctypes_binding(monkeypatch):
+    """Force casm.api to (re)load libccasm with the ctypes fallback
+
+    All module-level handles are monkeypatched, so the previously loaded
+    binding is restored after the test.
+    """
+    module = casm.api.api
+    for name in list(vars(module)):
+        if name.startswith('_casm_') or name in ['_lib_casm', '_lib_ccasm']:
+            monkeypatch.setattr(module, name, None)
+    monkeypatch.setattr(module, '_ccasm_cffi', None)
+    monkeypatch.setattr(module, '_loaded', False)
+    return module
+
+
+def test_ctypes_fallback(ctypes_binding):
+    api = casm.api.API()
+    assert isinstance(ctypes_binding._lib_ccasm, ctypes.CDLL)
+    assert api.primclex_null() is None
+    command_list = json.loads(api.command_list())
+    assert "init" in command_list
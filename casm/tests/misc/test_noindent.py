@@ -0,0 +1,90 @@
+import json
+import numpy as np
+
+import casm.misc.noindent as noindent
+
+
+def test_dumps():
+    input = {
+        "lattice_vectors": [[0.0, 2.0, 2.0], [2.0, 0.0, 2.0], [2.0, 2.0, 0.0]],
+        "coordinate_mode": "Fractional",
+        "atom_type": ["A", "B"],
+        "atom_properties": {
+            "force": {
+                "value": [[0.0, 0.1, -0.1], [1.5e-05, 0.0, 0.0]]
+            }
+        },
+        "global_properties": {
+            "energy": {
+                "value": 1.5e-05
+            },
+            "scale": {
+                "value": 1e16
+            }
+        }
+    }
+    data = noindent.singleline_arrays_json_printable(input)
+    expected = json.dumps(data,
+                          cls=noindent.NoIndentEncoder,
+                          indent=2,
+                          sort_keys=True)
+    s = noindent.dumps(data, sort_keys=True)
+    assert s == expected
+    assert json.loads(s) == input
+    assert s.splitlines()[2] == '    "force": {'
+    assert '"atom_type": ["A", "B"]' in s
+    assert '"value": 1.5e-05' in s
+    assert '"value": 1e+16' in s
+
+
+def test_dumps_nonfinite_and_strings():
+    input = {
+        "nan": float("nan"),
+        "inf": [float("inf"), -float("inf")],
+        "name": "\u00c5\tB",
+        "none": None,
+        "big": 2**70,
+        "small": -2**70,
+        "uint64": 2**64 - 1
+    }
+    data = noindent.singleline_arrays_json_printable(input)
+    expected = json.dumps(data,
+                          cls=noindent.NoIndentEncoder,
+                          indent=2,
+                          sort_keys=True)
+    s = noindent.dumps(data, sort_keys=True)
+    assert s == expected
+    assert '"nan": NaN' in s
+
+
+def test_dumps_ndarray():
+    input = {
+        "lattice_vectors": np.array([[0.0, 2.0, 2.0], [2.0, 0.0, 2.0],
+                                     [2.0, 2.0, 0.0]]),
+        "atom_coords": np.array([[0.0, 0.0, 0.0], [0.5, 0.25, 0.125]]),
+        "atom_type": ["A", "B"]
+    }
+    data = noindent.singleline_arrays_json_printable(input)
+    s = noindent.dumps(data, sort_keys=True)
+    assert '    [0.5, 0.25, 0.125]' in s.splitlines()
+    result = json.loads(s)
+    assert np.allclose(result["lattice_vectors"], input["lattice_vectors"])
+    assert np.allclose(result["atom_coords"], input["atom_coords"])
+    assert result["atom_type"] == ["A", "B"]
+
+
+def test_dumps_ndarray_matches_json(monkeypatch):
+    input = {
+        "value": np.array([[float("nan"), 1e-07, 0.1], [1.5e-05, 1e16,
+                                                        -float("inf")]]),
+        "index": np.array([0, 1, 2]),
+        "mask": np.array([True, False, True])
+    }
+    data = noindent.singleline_arrays_json_printable(input)
+    s = noindent.dumps(data, sort_keys=True)
+    monkeypatch.setattr(noindent, "orjson", None)
+    expected = noindent.dumps(data, sort_keys=True)
+    assert s == expected
+    assert '    [NaN, 1e-07, 0.1],' in s.splitlines()
+    assert '"index": [0, 1, 2]' in s
+    assert '"mask": [true, false, true]' in s
@@ -0,0 +1,165 @@
+import json
+import numpy as np
+import pytest
+
+ase = pytest.importorskip("ase")
+from ase.constraints import FixAtoms, FixScaled
+
+from casm.scripts.casm_convert import ASEIntermediary, main
+
+
+def make_casm_structure(atom_properties=None):
+    casm_structure = {
+        "lattice_vectors": [[0.0, 2.0, 2.0], [2.0, 0.0, 2.0], [2.0, 2.0,
+                                                               0.0]],
+        "coordinate_mode": "Fractional",
+        "atom_type": ["A", "B", "A"],
+        "atom_coords": [[0.0, 0.0, 0.0], [0.5, 0.5, 0.5], [0.25, 0.25, 0.25]]
+    }
+    if atom_properties is not None:
+        casm_structure["atom_properties"] = atom_properties
+    return casm_structure
+
+
+def test_make_structure_selectivedynamics():
+    casm_structure = make_casm_structure({
+        "selectivedynamics": {
+            "value": [[1.0, 1.0, 1.0], [1.0, 0.0, 0.0], [0.0, 0.0, 0.0]]
+        }
+    })
+    intermediary = ASEIntermediary({"A": "Al", "B": "Cu"})
+    ase_structure = intermediary.make_structure(casm_structure)
+
+    constraints = ase_structure.constraints
+    assert len(constraints) == 2
+    fix_atoms = [c for c in constraints if isinstance(c, FixAtoms)]
+    fix_scaled = [c for c in constraints if isinstance(c, FixScaled)]
+    assert len(fix_atoms) == 1
+    assert len(fix_scaled) == 1
+    assert fix_atoms[0].get_indices().tolist() == [0]
+    assert np.asarray(fix_scaled[0].get_indices()).tolist() == [1]
+    assert np.asarray(fix_scaled[0].mask).tolist() == [True, False, False]
+
+
+def test_make_structure_without_atom_properties():
+    intermediary = ASEIntermediary({"A": "Al", "B": "Cu"})
+    for atom_properties in [None, {}]:
+        casm_structure = make_casm_structure(atom_properties)
+        ase_structure = intermediary.make_structure(casm_structure)
+        assert ase_structure.constraints == []
+        assert ase_structure.get_chemical_symbols() == ["Al", "Cu", "Al"]
+        assert np.allclose(ase_structure.get_scaled_positions(),
+                           casm_structure["atom_coords"])
+        assert np.allclose(ase_structure.cell,
+                           casm_structure["lattice_vectors"])
+
+
+def test_chemical_symbols_conversion():
+    intermediary = ASEIntermediary({"A": "Al", "B": "Cu"})
+    ase_structure = intermediary.make_structure(make_casm_structure())
+    assert ase_structure.get_chemical_symbols() == ["Al", "Cu", "Al"]
+    casm_structure = intermediary.make_casm_structure(ase_structure)
+    assert casm_structure["atom_type"] == ["A", "B", "A"]
+
+
+def test_chemical_symbols_no_conversion():
+    intermediary = ASEIntermediary()
+    casm_structure = make_casm_structure()
+    casm_structure["atom_type"] = ["Al", "Cu", "Al"]
+    ase_structure = intermediary.make_structure(casm_structure)
+    assert ase_structure.get_chemical_symbols() == ["Al", "Cu", "Al"]
+    casm_structure = intermediary.make_casm_structure(ase_structure)
+    assert casm_structure["atom_type"] == ["Al", "Cu", "Al"]
+
+
+def test_ase_to_casm_chemical_symbols():
+    casm_to_ase = {"A": "Al", "B": "Cu"}
+    intermediary = ASEIntermediary(casm_to_ase)
+    assert intermediary.ase_to_casm_chemical_symbols == {"Al": "A", "Cu": "B"}
+
+    # the input dict is copied, not aliased
+    casm_to_ase["C"] = "Ni"
+    assert "C" not in intermediary.casm_to_ase_chemical_symbols
+
+
+def test_jobs_must_be_positive(capsys):
+    for jobs in ["0", "-1"]:
+        with pytest.raises(SystemExit):
+            main(["--jobs", jobs])
+        assert "--jobs: must be >= 1" in capsys.readouterr().err
+
+
+def test_import_ase_retries_partial_import(monkeypatch):
+    import casm.scripts.casm_convert as casm_convert
+    # as if `import ase.io` succeeded but `ase.constraints` failed
+    monkeypatch.setattr(casm_convert, "FixAtoms", None)
+    monkeypatch.setattr(casm_convert, "FixScaled", None)
+    casm_convert._import_ase()
+    assert casm_convert.FixAtoms is FixAtoms
+    assert casm_convert.FixScaled is FixScaled
+
+
+def write_casm_inputs(dirpath, names):
+    filenames = []
+    for name in names:
+        filename = dirpath / name
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        casm_structure = make_casm_structure()
+        casm_structure["atom_type"] = ["Al", "Cu", "Al"]
+        filename.write_text(json.dumps(casm_structure))
+        filenames.append(str(filename))
+    return filenames
+
+
+def test_convert_single_input(tmp_path, capsys):
+    inputs = write_casm_inputs(tmp_path, ["a.json"])
+    main(["--input"] + inputs +
+         ["--input-format", "casm", "--output-format", "vasp"])
+    expected = str(tmp_path / "structure.vasp")
+    assert capsys.readouterr().out.splitlines() == [expected]
+    assert (tmp_path / "structure.vasp").exists()
+
+
+def test_convert_multiple_inputs(tmp_path, capsys):
+    inputs = write_casm_inputs(tmp_path, ["a.json", "b.json"])
+    main(["--input"] + inputs +
+         ["--input-format", "casm", "--output-format", "vasp"])
+    expected = [str(tmp_path / "a.vasp"), str(tmp_path / "b.vasp")]
+    assert capsys.readouterr().out.splitlines() == expected
+
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    main(["--input"] + inputs + [
+        "--input-format", "casm", "--output-format", "vasp", "--output-dir",
+        str(output_dir)
+    ])
+    expected = [str(output_dir / "a.vasp"), str(output_dir / "b.vasp")]
+    assert capsys.readouterr().out.splitlines() == expected
+
+
+def test_convert_multiple_inputs_same_output(tmp_path):
+    inputs = write_casm_inputs(tmp_path, ["x/a.json", "y/a.json"])
+    with pytest.raises(Exception, match="same output file"):
+        main(["--input"] + inputs + [
+            "--input-format", "casm", "--output-format", "vasp",
+            "--output-dir",
+            str(tmp_path)
+        ])
+    assert not (tmp_path / "a.vasp").exists()
+
+
+def test_convert_multiple_inputs_with_output(tmp_path):
+    inputs = write_casm_inputs(tmp_path, ["a.json", "b.json"])
+    with pytest.raises(Exception, match="single --input"):
+        main(["--input"] + inputs + [
+            "--input-format", "casm", "--output",
+            str(tmp_path / "out.vasp")
+        ])
+
+
+def test_convert_files_checks_formats_before_iterating(tmp_path):
+    inputs = write_casm_inputs(tmp_path, ["a.json"])
+    intermediary = ASEIntermediary()
+    with pytest.raises(Exception, match="unknown format"):
+        intermediary.convert_files(inputs, "casm",
+                                   [str(tmp_path / "a.out")], "not-a-format")